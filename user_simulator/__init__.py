@@ -1,5 +1,5 @@
 from .agents import user_agent, market_researcher_agent
-from .simulate_profiles import generate_profile, Profile, ProfileList
+from .simulate_profiles import generate_profile, generate_profile_async, generate_profiles_async, Profile, ProfileList
 from .simulator import Simulator
 from .utils import load_prompt
 from .hooks import SystemInstructionsHook
@@ -10,6 +10,8 @@ __all__ = [
     "user_agent",
     "market_researcher_agent",
     "generate_profile",
+    "generate_profile_async",
+    "generate_profiles_async",
     "Profile",
     "ProfileList",
     "Simulator",
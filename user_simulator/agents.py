@@ -30,12 +30,16 @@ def user_instructions(
 ) -> str:
     """
     Generate user instructions from template for agent configuration.
+
+    The profile is fixed for a conversation, so the prompt is rendered once.
     """
-    template = load_prompt(USER_PROMPT_NAME, USER_PROMPT_VERSION)
-    prompt = template.render(
-        user_profile=run_context.context.user_profile
-    )
-    return prompt
+    context = run_context.context
+    if context._rendered_user_prompt is None:
+        template = load_prompt(USER_PROMPT_NAME, USER_PROMPT_VERSION)
+        context._rendered_user_prompt = template.render(
+            user_profile=context.user_profile
+        )
+    return context._rendered_user_prompt
 
 
 def market_researcher_instructions(
@@ -44,16 +48,19 @@ def market_researcher_instructions(
 ) -> str:
     """
     Generate market researcher instructions from template for agent configuration.
-    """
-    template = load_prompt(MARKET_RESEARCHER_PROMPT_NAME, MARKET_RESEARCHER_PROMPT_VERSION)
 
-    prompt = template.render(
-        population=run_context.context.user_population,
-        study_title=run_context.context.study_title,
-        study_summary=run_context.context.study_summary,
-        discussion=run_context.context.discussion_block,
-    )
-    return prompt
+    The prompt is rendered once per discussion block and reused across turns.
+    """
+    context = run_context.context
+    if context._rendered_researcher_prompt is None:
+        template = load_prompt(MARKET_RESEARCHER_PROMPT_NAME, MARKET_RESEARCHER_PROMPT_VERSION)
+        context._rendered_researcher_prompt = template.render(
+            population=context.user_population,
+            study_title=context.study_title,
+            study_summary=context.study_summary,
+            discussion=context.discussion_block,
+        )
+    return context._rendered_researcher_prompt
 
 
 user_agent = Agent(
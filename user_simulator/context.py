@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 
 class StudyContext:
@@ -24,5 +24,20 @@ class StudyContext:
         self.study_title = study_title
         self.study_summary = study_summary
         self.user_population = user_population
+        self.user_profile = user_profile
+
+        # Rendered agent prompts, filled lazily by the agent instruction functions
+        self._rendered_user_prompt: Optional[str] = None
+        self._rendered_researcher_prompt: Optional[str] = None
         self.discussion_block = discussion_block
-        self.user_profile = user_profile
\ No newline at end of file
+
+    @property
+    def discussion_block(self) -> Dict[str, Any]:
+        """The discussion guide block currently being covered."""
+        return self._discussion_block
+
+    @discussion_block.setter
+    def discussion_block(self, block: Dict[str, Any]) -> None:
+        """Advance to a new block and drop the stale researcher prompt."""
+        self._discussion_block = block
+        self._rendered_researcher_prompt = None
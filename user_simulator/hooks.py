@@ -1,11 +1,42 @@
-from typing import Optional, List
+from typing import Optional, List, Tuple
 import random
+from functools import lru_cache
 
 from agents import AgentHooks, RunContextWrapper, Agent
 from agents.items import TResponseInputItem
 
 from .context import StudyContext
 
+LOW_FREQUENCY_FRICTION: Tuple[str, ...] = (
+    "Keep this response SHORT (1-2 sentences max)",
+    "This is a complex topic for you - give a longer, more thoughtful response with specific examples",
+    "In this response, include a brief false start or self-correction (e.g., 'Well, I usually... actually, let me think about that differently...')",
+    "For this response, reference a very specific recent case with messy details (exact dates, specific numbers, real frustrations)",
+    "In this answer, show some uncertainty or admit a knowledge gap rather than being overly confident",
+    "Reference a specific practice constraint or workaround you've had to develop (EMR quirks, insurance hassles, scheduling issues)",
+    "Mention a specific time period or event that anchors your experience ('last winter when COVID cases spiked,' 'after the Epic upgrade,' 'during the formulary change')",
+    "Show mild emotion about something in your practice - frustration, satisfaction, surprise, or concern",
+    "Include a specific detail that reveals your practice's unique context (rural patient travel times, academic teaching load, specific payer mix, etc.)",
+    "Reference a colleague interaction or case discussion that influenced your thinking",
+    "Mention a patient outcome that surprised you or changed your approach slightly",
+    "Use some colloquial language or sentence fragments that match your age and background",
+)
+
+HIGH_FREQUENCY_FRICTION = "Keep this response SHORT (1-2 sentences max)"
+
+
+@lru_cache(maxsize=None)
+def _base_instruction(communication_style: str) -> str:
+    """Build the human-like response instruction for a communication style."""
+    return f"""Respond as a real clinician. Communication style: {communication_style}
+
+Avoid AI patterns:
+- Don't start with "That's a good question"
+- Don't perfectly mirror question structure  
+- Include natural speech patterns and minor imperfections
+- Reference your actual practice context when relevant
+"""
+
 
 class SystemInstructionsHook(AgentHooks[StudyContext]):
     """Agent hook that injects system instructions to make user responses more human-like."""
@@ -21,28 +52,7 @@ class SystemInstructionsHook(AgentHooks[StudyContext]):
             
         # Create human-like system message based on user profile
         user_profile = context.context.user_profile
-        
-        # Extract key profile elements for personalization
-        profile_elements = []
-        if "professional_background" in user_profile:
-            profile_elements.append(f"Professional background: {user_profile['professional_background']}")
-        if "practice_setting" in user_profile:
-            profile_elements.append(f"Practice setting: {user_profile['practice_setting']}")
-        if "communication_style" in user_profile:
-            profile_elements.append(f"Communication style: {user_profile['communication_style']}")
-        
-        profile_context = "\n".join(profile_elements) if profile_elements else "Medical professional"
-        
-        style_note = f"Communication style: {user_profile.get('communication_style', 'Professional')}"
-        
-        base_instruction = f"""Respond as a real clinician. {style_note}
-
-Avoid AI patterns:
-- Don't start with "That's a good question"
-- Don't perfectly mirror question structure  
-- Include natural speech patterns and minor imperfections
-- Reference your actual practice context when relevant
-"""
+        base_instruction = _base_instruction(user_profile.get('communication_style', 'Professional'))
 
         # Inject the system message at the beginning of input_items
         system_message: TResponseInputItem = {
@@ -69,25 +79,9 @@ Avoid AI patterns:
 
         # 30% chance of adding low frequency friction
         if random.random() < 0.3:
-            low_frequency_friction = [
-                "Keep this response SHORT (1-2 sentences max)",
-                "This is a complex topic for you - give a longer, more thoughtful response with specific examples",
-                "In this response, include a brief false start or self-correction (e.g., 'Well, I usually... actually, let me think about that differently...')",
-                "For this response, reference a very specific recent case with messy details (exact dates, specific numbers, real frustrations)",
-                "In this answer, show some uncertainty or admit a knowledge gap rather than being overly confident",            
-                "Reference a specific practice constraint or workaround you've had to develop (EMR quirks, insurance hassles, scheduling issues)",
-                "Mention a specific time period or event that anchors your experience ('last winter when COVID cases spiked,' 'after the Epic upgrade,' 'during the formulary change')",
-                "Show mild emotion about something in your practice - frustration, satisfaction, surprise, or concern",
-                "Include a specific detail that reveals your practice's unique context (rural patient travel times, academic teaching load, specific payer mix, etc.)",
-                "Reference a colleague interaction or case discussion that influenced your thinking",
-                "Mention a patient outcome that surprised you or changed your approach slightly",
-                "Use some colloquial language or sentence fragments that match your age and background",
-            ]
-            injected_friction = random.choice(low_frequency_friction)
-            injected_list.append(injected_friction)
+            injected_list.append(random.choice(LOW_FREQUENCY_FRICTION))
 
         # 50% chance of adding high frequency friction of keeping the response short
         if random.random() < 0.5:
-            high_frequency_friction = "Keep this response SHORT (1-2 sentences max)"
-            injected_list.append(high_frequency_friction)
+            injected_list.append(HIGH_FREQUENCY_FRICTION)
         return "\n".join(injected_list) if injected_list else None
@@ -1,8 +1,9 @@
 import os
+import json
 import random
 from typing import Optional, Dict, List, Any
 
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -23,6 +24,71 @@ class ProfileList(BaseModel):
     profiles: List[Profile]
 
 
+class IndexedProfile(Profile):
+    index: int
+
+
+class IndexedProfileList(BaseModel):
+    profiles: List[IndexedProfile]
+
+
+# Extra requests made for seeds a batch response left out
+MAX_PROFILE_RETRIES = 2
+
+
+_client: Optional[OpenAI] = None
+
+
+def _get_client() -> OpenAI:
+    """Return the shared OpenAI client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+
+def _profile_request(
+    prompt: str,
+    number_of_profile: int,
+    text_format: type = ProfileList,
+) -> Dict[str, Any]:
+    """Build the Responses API arguments for a profile generation call."""
+    messages = [
+        {"role": "system", "content": prompt},
+    ]
+
+    return {
+        "input": messages,
+        "model": "gpt-4.1",
+        "max_output_tokens": 512 * number_of_profile,
+        "temperature": 0.5,
+        "text_format": text_format,
+        "reasoning": None,
+    }
+
+
+def _render_profile_prompt(
+    age: Optional[str],
+    gender: Optional[str],
+    urban: Optional[str],
+    academic: Optional[str],
+    state: Optional[str],
+    other_characteristics: Optional[str],
+    number_of_profile: int,
+) -> str:
+    """Render the single-seed profile generation prompt."""
+    template = load_prompt("generate_users", "v0.0.1")
+    return template.render(
+        number_of_profile=number_of_profile,
+        age=age,
+        gender=gender,
+        urban=urban,
+        academic=academic,
+        state=state,
+        other_characteristics=other_characteristics,
+    )
+
+
 def generate_profile(
     age: Optional[str] = None,
     gender: Optional[str] = None,
@@ -47,32 +113,89 @@ def generate_profile(
     Returns:
         A dictionary containing the selected clinician profile data
     """
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-    template = load_prompt("generate_users", "v0.0.1")
-
-    prompt = template.render(
-        number_of_profile=number_of_profile,
-        age=age,
-        gender=gender,
-        urban=urban,
-        academic=academic,
-        state=state,
-        other_characteristics=other_characteristics,
-    )
-
-    messages = [
-        {"role": "system", "content": prompt},
-    ]
+    client = _get_client()
 
     response = client.responses.parse(
-        input=messages,
-        model="gpt-4.1",
-        max_output_tokens=512 * number_of_profile,
-        temperature=0.5,
-        text_format=ProfileList,
-        reasoning=None,
+        **_profile_request(
+            _render_profile_prompt(age, gender, urban, academic, state, other_characteristics, number_of_profile),
+            number_of_profile,
+        )
     )
 
     selected_profile = random.choice(response.output_parsed.profiles)
-    return selected_profile.model_dump()
\ No newline at end of file
+    return selected_profile.model_dump()
+
+
+async def generate_profile_async(
+    age: Optional[str] = None,
+    gender: Optional[str] = None,
+    urban: Optional[str] = None,
+    academic: Optional[str] = None,
+    state: Optional[str] = None,
+    other_characteristics: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Async variant of `generate_profile` for a single seed.
+    """
+    seed = {
+        "age": age,
+        "gender": gender,
+        "urban": urban,
+        "academic": academic,
+        "state": state,
+        "other_characteristics": other_characteristics,
+    }
+    profiles = await generate_profiles_async([seed])
+    return profiles[0]
+
+
+async def generate_profiles_async(
+    seeds: List[Dict[str, Any]],
+    client: Optional[AsyncOpenAI] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Generate one clinician profile per seed in a single Responses API call.
+
+    Each seed is sent with its index and profiles are matched back by that
+    index. Seeds missing from the response are re-requested up to
+    `MAX_PROFILE_RETRIES` times.
+    
+    Args:
+        seeds: Profile characteristics (age, gender, urban, academic, state,
+            other_characteristics), one dictionary per requested profile
+        client: Async client to reuse; when omitted a client is opened and
+            closed for this call
+        
+    Returns:
+        A list of profile dictionaries in the same order as `seeds`
+    """
+    if client is None:
+        async with AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY")) as owned_client:
+            return await generate_profiles_async(seeds, owned_client)
+
+    template = load_prompt("generate_users", "v0.0.2")
+
+    results: Dict[int, Dict[str, Any]] = {}
+    pending = list(range(len(seeds)))
+    for _ in range(MAX_PROFILE_RETRIES + 1):
+        user_characteristics = [
+            {"index": i, **{key: value for key, value in seeds[i].items() if value is not None}}
+            for i in pending
+        ]
+        prompt = template.render(
+            number_of_profile=len(pending),
+            user_characteristics=json.dumps(user_characteristics, indent=2),
+        )
+
+        response = await client.responses.parse(
+            **_profile_request(prompt, len(pending), text_format=IndexedProfileList)
+        )
+
+        for profile in response.output_parsed.profiles:
+            if profile.index in pending and profile.index not in results:
+                results[profile.index] = profile.model_dump(exclude={"index"})
+        pending = [i for i in pending if i not in results]
+        if not pending:
+            return [results[i] for i in range(len(seeds))]
+
+    raise ValueError(f"No profile generated for seeds {pending} after {MAX_PROFILE_RETRIES} retries")
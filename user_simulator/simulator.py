@@ -1,17 +1,44 @@
 import os
-import json
-from tqdm import tqdm
+import logging
+import pathlib
+import orjson
+import asyncio
+import hashlib
+from tqdm.asyncio import tqdm_asyncio
 import random
+import concurrent.futures
+from collections import deque, OrderedDict
+from functools import lru_cache
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator, Callable, Tuple, Union
 
-from agents import Runner
+from agents import Agent, Runner, RunContextWrapper
+from openai import AsyncOpenAI
 
-from .simulate_profiles import generate_profile
+from .simulate_profiles import generate_profiles_async
 from .context import StudyContext
 from .agents import user_agent, market_researcher_agent
 from .constant import USER_PROFILE_DICT
 
+logger = logging.getLogger(__name__)
+
+ConversationResult = Union[List[Dict[str, str]], Exception]
+
+USER_MEMORY_MESSAGES = 4
+RESPONSE_CACHE_SIZE = 128
+
+
+@lru_cache(maxsize=32)
+def _parse_study(path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse a study JSON; keyed on mtime so rewritten studies are reloaded."""
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
+
+def _load_study(path: str) -> Dict[str, Any]:
+    """Return the cached study at `path`; the dict is shared and must be treated as read-only."""
+    return _parse_study(path, os.stat(path).st_mtime_ns)
+
 
 class Simulator:
     """High-level orchestration for profile generation and interview simulation."""
@@ -22,12 +49,20 @@ class Simulator:
         number_of_users: int = 30,
         user_population: str = "pulmonologist",
         simulation_id: Optional[str] = None,
+        researcher_context_limit: Optional[int] = None,
     ) -> None:
 
         self.simulation_id = simulation_id or datetime.now().strftime("%Y%m%d%H%M%S")
         self.number_of_users = number_of_users
         self.user_population = user_population
         self.profile_dict = USER_PROFILE_DICT
+        # Max messages the researcher sees per turn (None keeps the full dialogue)
+        self.researcher_context_limit = researcher_context_limit
+
+        # Researcher opener outputs keyed by (agent, system prompt, input), shared across conversations
+        self._response_cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._inflight_runs: Dict[str, "asyncio.Future[Any]"] = {}
+        self._inflight_waiters: Dict[str, int] = {}
 
         # Create directory for simulation data
         self.data_root = "../data"
@@ -37,58 +72,76 @@ class Simulator:
         self.conversations_dir = os.path.join(self.sim_root, "conversations")
         os.makedirs(self.sim_root, exist_ok=True)
         os.makedirs(self.conversations_dir, exist_ok=True)
+        self._conv_dir = pathlib.Path(self.conversations_dir)
+        self._conv_prefix = "conversation"
 
         # import study json
         study_path = os.path.join(self.data_root, "studies", f"{study}.json")
         if not os.path.exists(study_path):
             raise FileNotFoundError(f"Study {study} not found")
 
-        with open(study_path, "r") as f:
-            self.study = json.load(f)
+        # Shared with other simulators of the same study; never mutated here
+        self.study = _load_study(os.path.abspath(study_path))
 
         # Generate or load user profiles for this simulation
         self.user_profiles_path = os.path.join(self.sim_root, "user_profiles.json")
         if not os.path.exists(self.user_profiles_path):
             self.user_profiles = self.generate_users()
         else:
-            with open(self.user_profiles_path, "r") as f:
-                self.user_profiles = json.load(f)
+            with open(self.user_profiles_path, "rb") as f:
+                self.user_profiles = orjson.loads(f.read())
 
     def generate_users(self) -> List[Dict[str, Any]]:
         """Generate user profiles and persist them for this simulation run."""
+        coro = self.generate_users_async()
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coro)
+
+        # Already inside an event loop (e.g. a notebook): run on a worker thread
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result()
+
+    async def generate_users_async(self, batch_size: int = 5, concurrency: int = 8) -> List[Dict[str, Any]]:
+        """Generate user profiles in concurrent batches and persist them for this simulation run."""
 
-        generated_profiles: List[Dict[str, Any]] = []
-        for _ in tqdm(range(self.number_of_users), desc="Generating users"):
-            # Draw a seed persona and expand via LLM
-            profile_seed = {
-                "age_range": random.choice(self.profile_dict["age"]),
+        # Draw all seed personas up front; only the LLM expansion is concurrent
+        seeds: List[Dict[str, Any]] = []
+        for _ in range(self.number_of_users):
+            age_range = random.choice(self.profile_dict["age"])
+            seeds.append({
+                "age": str(random.randint(age_range[0], age_range[1])),
                 "gender": random.choice(self.profile_dict["gender"]),
                 "urban": random.choice(self.profile_dict["urban"]),
                 "academic": random.choice(self.profile_dict["academic"]),
                 "state": random.choice(self.profile_dict["state"]),
                 "other_characteristics": None,
-            }
-            age = random.randint(profile_seed["age_range"][0], profile_seed["age_range"][1])
-
-            # simulate user profile
-            profile = generate_profile(
-                age=str(age),
-                gender=profile_seed["gender"],
-                urban=profile_seed["urban"],
-                academic=profile_seed["academic"],
-                state=profile_seed["state"],
-                other_characteristics=profile_seed["other_characteristics"],
-                number_of_profile=5,
-            )
+            })
+
+        semaphore = asyncio.Semaphore(concurrency)
 
-            profile_str = f"{age}yo {profile_seed['gender']}, {profile_seed['urban']}, {profile_seed['academic']}, {profile_seed['state']}"
-            profile["profile"] = profile_str
+        # Each request expands a batch of seeds, one profile per seed
+        batches = [seeds[i:i + batch_size] for i in range(0, len(seeds), batch_size)]
+        async with AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY")) as client:
 
-            generated_profiles.append(profile)
+            async def _bounded(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+                async with semaphore:
+                    return await generate_profiles_async(batch, client)
+
+            batch_profiles = await tqdm_asyncio.gather(
+                *[_bounded(batch) for batch in batches], desc="Generating users"
+            )
+        generated_profiles: List[Dict[str, Any]] = [
+            profile for profiles in batch_profiles for profile in profiles
+        ]
+
+        for profile, seed in zip(generated_profiles, seeds):
+            profile["profile"] = f"{seed['age']}yo {seed['gender']}, {seed['urban']}, {seed['academic']}, {seed['state']}"
 
         # save user profiles
-        with open(self.user_profiles_path, "w") as f:
-            json.dump(generated_profiles, f, indent=2)
+        with open(self.user_profiles_path, "wb") as f:
+            f.write(orjson.dumps(generated_profiles, option=orjson.OPT_INDENT_2))
 
         return generated_profiles
 
@@ -111,6 +164,7 @@ class Simulator:
 
     def save_conversation(self, index: int, dialogue: List[Dict[str, str]], user_profile: Dict[str, Any]) -> str:
         """Save a conversation with its associated user profile to JSON."""
+        now = datetime.now()
         conversation_data = {
             "profile": user_profile,
             "dialogue": dialogue,
@@ -118,38 +172,113 @@ class Simulator:
                 "simulation_id": self.simulation_id,
                 "user_index": index,
                 "study": self.study.get("study_name", "Unknown Study"),
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now.isoformat(),
                 "total_turns": len(dialogue),
                 "user_population": self.user_population
             }
         }
         
         # Create filename with timestamp and index for uniqueness
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"conversation_{index:03d}_{timestamp}.json"
-        filepath = os.path.join(self.conversations_dir, filename)
-        
-        with open(filepath, "w") as f:
-            json.dump(conversation_data, f, indent=2, ensure_ascii=False)
+        filepath = self._conv_dir / f"{self._conv_prefix}_{index:03d}_{now:%Y%m%d_%H%M%S}.json"
+        filepath.write_bytes(orjson.dumps(conversation_data, option=orjson.OPT_INDENT_2))
         
-        print(f"Conversation saved: {filename}")
-        return filepath
+        logger.info("Conversation saved: %s", filepath.name)
+        return str(filepath)
+
+    @staticmethod
+    def _record_message(
+        message: Dict[str, str],
+        dialogue: List[Dict[str, str]],
+        user_window: deque,
+        researcher_window: Optional[deque],
+    ) -> None:
+        """Append a message to the full dialogue and each agent's view of it."""
+        dialogue.append(message)
+        user_window.append(message)
+        if researcher_window is not None:
+            researcher_window.append(message)
+
+    def _drop_inflight_run(self, key: str, task: "asyncio.Future[Any]") -> None:
+        """Forget `task` as the in-flight run for `key` unless it was already replaced."""
+        if self._inflight_runs.get(key) is task:
+            del self._inflight_runs[key]
+
+    async def _cached_run(
+        self,
+        agent: Agent[StudyContext],
+        agent_input: List[Dict[str, str]],
+        context: StudyContext,
+    ) -> Any:
+        """Run an agent and return its final output, reusing identical earlier requests.
+
+        Concurrent identical requests share a single in-flight run, which is
+        cancelled when its last waiter is cancelled. Only use this
+        for agents whose output may be reused, e.g. the researcher's opener.
+        """
+        system_prompt = await agent.get_system_prompt(RunContextWrapper(context))
+        key = hashlib.blake2b(
+            orjson.dumps([agent.name, system_prompt, agent_input]), digest_size=16
+        ).hexdigest()
+
+        if key in self._response_cache:
+            self._response_cache.move_to_end(key)
+            return self._response_cache[key]
+
+        task = self._inflight_runs.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                Runner.run(starting_agent=agent, input=agent_input, context=context)
+            )
+            self._inflight_runs[key] = task
+            task.add_done_callback(lambda done: self._drop_inflight_run(key, done))
+
+        # The shared run is cancelled only once every waiter has gone away
+        self._inflight_waiters[key] = self._inflight_waiters.get(key, 0) + 1
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            remaining = self._inflight_waiters[key] - 1
+            if remaining:
+                self._inflight_waiters[key] = remaining
+            else:
+                del self._inflight_waiters[key]
+                if not task.done():
+                    self._drop_inflight_run(key, task)
+                    task.cancel()
+
+        output = result.final_output
+        self._response_cache[key] = output
+        if len(self._response_cache) > RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+        return output
 
     async def simulate_conversation(self, index: int) -> List[Dict[str, str]]:
         """Simulate a conversation with a user."""
         context = self._initial_context(self.user_profiles[index])
 
         dialogue: List[Dict[str, str]] = []
+        # Limit user agent to only see the last few messages for more human-like memory
+        user_window: deque = deque(maxlen=USER_MEMORY_MESSAGES)
+        researcher_window: Optional[deque] = (
+            deque(maxlen=self.researcher_context_limit)
+            if self.researcher_context_limit is not None else None
+        )
         block_index = 0
 
         while True:
-            agent_input = dialogue if dialogue else [{"role": "user", "content": "Hi"}]
-            researcher_result = await Runner.run(
-                starting_agent=market_researcher_agent,
-                input=agent_input,
-                context=context,
-            )
-            researcher_output = researcher_result.final_output
+            if not dialogue:
+                # The opener is identical for every user in a block, so it is shared
+                researcher_output = await self._cached_run(
+                    market_researcher_agent, [{"role": "user", "content": "Hi"}], context
+                )
+            else:
+                agent_input = list(researcher_window) if researcher_window is not None else dialogue
+                researcher_result = await Runner.run(
+                    starting_agent=market_researcher_agent,
+                    input=agent_input,
+                    context=context,
+                )
+                researcher_output = researcher_result.final_output
 
             if researcher_output and getattr(researcher_output, "finished", False):
                 block_index += 1
@@ -164,22 +293,58 @@ class Simulator:
                 raise ValueError("No next question from market researcher")
 
             question = researcher_output.next_question
-            dialogue.append({"role": "assistant", "content": question})
-            print("Researcher: {}".format(question))
+            self._record_message(
+                {"role": "assistant", "content": question}, dialogue, user_window, researcher_window
+            )
+            logger.info("Researcher: %s", question)
 
-            # Limit user agent to only see last 4 messages for more human-like memory
-            user_dialogue = dialogue[-4:] if len(dialogue) > 4 else dialogue
-            
             user_result = await Runner.run(
                 starting_agent=user_agent,
-                input=user_dialogue,
+                input=list(user_window),
                 context=context,
             )
             user_answer = user_result.final_output or ""
-            dialogue.append({"role": "user", "content": user_answer})
-            print("User: {}".format(user_answer))
+            self._record_message(
+                {"role": "user", "content": user_answer}, dialogue, user_window, researcher_window
+            )
+            logger.info("User: %s", user_answer)
 
         # Save the conversation with the user profile
         self.save_conversation(index, dialogue, self.user_profiles[index])
         
         return dialogue
+
+    async def simulate_all(
+        self,
+        concurrency: int = 10,
+        on_result: Optional[Callable[[int, ConversationResult], None]] = None,
+    ) -> AsyncIterator[Tuple[int, ConversationResult]]:
+        """Simulate conversations for every user concurrently.
+
+        At most `concurrency` conversations are in flight at once. Results are
+        yielded as `(index, dialogue)` pairs in completion order. A conversation
+        that fails yields `(index, exception)` instead and does not stop the
+        others. If you stop iterating early, call `aclose()` on the generator
+        (or wrap it in `contextlib.aclosing`) so the remaining conversations
+        are cancelled.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _one(index: int) -> Tuple[int, ConversationResult]:
+            async with semaphore:
+                try:
+                    return index, await self.simulate_conversation(index)
+                except Exception as e:
+                    logger.exception("Conversation %d failed", index)
+                    return index, e
+
+        tasks = [asyncio.ensure_future(_one(i)) for i in range(len(self.user_profiles))]
+        try:
+            for future in asyncio.as_completed(tasks):
+                index, result = await future
+                if on_result is not None:
+                    on_result(index, result)
+                yield index, result
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -1,6 +1,6 @@
-import json
 import os
-from typing import List, Dict, Any
+import orjson
+from typing import List, Dict, Any, Optional
 
 import openai
 from pydantic import BaseModel
@@ -38,10 +38,15 @@ class DiscussionGuide(BaseModel):
 
 class StudyDesigner:
     """Class to design studies and generate discussion guides for market research."""
+
+    # Shared across instances so the connection pool stays warm
+    _shared_client: Optional[openai.OpenAI] = None
     
     def __init__(self):
         """Initialize the StudyDesigner with OpenAI client."""
-        self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        if StudyDesigner._shared_client is None:
+            StudyDesigner._shared_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = StudyDesigner._shared_client
         
         # Model configurations for different tasks
         self.study_generation_config = {
@@ -188,8 +193,8 @@ class StudyDesigner:
             filename = f"study_{study['study_id']}.json"
             filepath = os.path.join(studies_dir, filename)
             
-            with open(filepath, 'w') as f:
-                json.dump(study, f, indent=4, ensure_ascii=False)
+            with open(filepath, 'wb') as f:
+                f.write(orjson.dumps(study, option=orjson.OPT_INDENT_2))
             
             print(f"Saved study to {filepath}")
 
@@ -1,10 +1,20 @@
-import os
 import jinja2
 
+PROMPT_LIBRARY_DIR = "../prompt_library"
+
+# Compiled templates are memoized by the environment for the life of the process.
+_prompt_env = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(PROMPT_LIBRARY_DIR),
+    cache_size=-1,
+    auto_reload=False,
+)
+
 
 def load_prompt(prompt_name: str, prompt_version: str) -> jinja2.Template:
     """Load a Jinja2 prompt template from the local prompt_library.
 
+    Templates are compiled once and cached, so repeated calls are cheap.
+
     Args:
         prompt_name: Directory name under `prompt_library/` (e.g. "user_simulator").
         prompt_version: File version name (e.g. "v0.0.1").
@@ -13,9 +23,8 @@ def load_prompt(prompt_name: str, prompt_version: str) -> jinja2.Template:
         A compiled Jinja2 Template.
     """
 
-    prompt_path = f"../prompt_library/{prompt_name}/{prompt_version}.jinja"
-    if not os.path.exists(prompt_path):
-        raise FileNotFoundError(f"Prompt {prompt_path} not found")
-
-    with open(prompt_path, "r") as f:
-        return jinja2.Template(f.read())
+    template_name = f"{prompt_name}/{prompt_version}.jinja"
+    try:
+        return _prompt_env.get_template(template_name)
+    except jinja2.TemplateNotFound:
+        raise FileNotFoundError(f"Prompt {PROMPT_LIBRARY_DIR}/{template_name} not found") from None